@@ -4,9 +4,16 @@ from typing import Optional
 from rich import print
 from rich.console import Console
 from rich.markdown import Markdown
+from rich.table import Table
 import yaml
 import re
+import gzip
+import hashlib
+import json
+import os
 import subprocess
+import tempfile
+import time
 from collections import defaultdict, deque
 from datetime import datetime
 from openai import OpenAI
@@ -15,6 +22,9 @@ app = typer.Typer()
 console = Console()
 client = OpenAI()
 
+STORE_DIR = Path("outputs") / ".store"
+ARTIFACT_KEYS = ("prompt", "raw", "response", "module")
+
 
 def resolve_order(prompts: dict, flow: list[str]) -> list[str]:
     graph = defaultdict(list)
@@ -55,6 +65,109 @@ def save_text_file(path: Path, content: str):
     path.write_text(content, encoding='utf-8')
 
 
+def write_atomic(path: Path, data: bytes):
+    """Write through a unique temp file and rename, so readers never see a partial file."""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def object_path(digest: str) -> Path:
+    return STORE_DIR / "objects" / digest[:2] / f"{digest[2:]}.gz"
+
+
+def store_object(content: str) -> str:
+    """Store content gzip-compressed under its sha256 digest; identical content is stored once."""
+    data = content.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(digest)
+    try:
+        # Refresh mtime so gc's grace period covers objects that are referenced again.
+        os.utime(path)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, gzip.compress(data))
+    return digest
+
+
+def load_object(digest: str) -> str:
+    path = object_path(digest)
+    if not path.exists():
+        console.print(f"[red]Artifact missing from store:[/red] {digest}")
+        raise typer.Exit(1)
+    return gzip.decompress(path.read_bytes()).decode("utf-8")
+
+
+def save_manifest(output_dir: Path, manifest: dict):
+    runs_dir = output_dir / "runs"
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    write_atomic(runs_dir / f"{manifest['run_id']}.json", json.dumps(manifest, indent=2).encode("utf-8"))
+
+
+def list_manifests(output_dir: Path) -> list[Path]:
+    return sorted((output_dir / "runs").glob("*.json"))
+
+
+def load_manifest(output_dir: Path, run_id: str) -> dict:
+    """Load a run manifest by ID, or the most recent one for 'latest'."""
+    manifests = list_manifests(output_dir)
+    if run_id == "latest":
+        path = manifests[-1] if manifests else None
+    else:
+        path = output_dir / "runs" / f"{run_id}.json"
+    if not path or not path.exists():
+        console.print(f"[red]Run not found:[/red] {run_id}")
+        raise typer.Exit(1)
+    return json.loads(path.read_text())
+
+
+def render_log(entry: dict) -> str:
+    """Rebuild a step log from the stored artifacts referenced by a manifest entry."""
+    ts = entry["timestamp"]
+    if "response" not in entry:
+        return f"[{ts}] === PROMPT ===\n{load_object(entry['prompt'])}\n\n[{ts}] === NO RESPONSE RECORDED ==="
+    if "raw" not in entry:
+        return f"[{ts}] === MANUAL INPUT ===\n{load_object(entry['response'])}"
+    return (f"[{ts}] === PROMPT ===\n{load_object(entry['prompt'])}\n\n"
+            f"[{ts}] === RAW RESPONSE ===\n{load_object(entry['raw'])}\n\n"
+            f"[{ts}] === EXTRACTED CODE ===\n{load_object(entry['response'])}")
+
+
+def sweep_store(grace_seconds: int) -> tuple[int, int]:
+    """Delete stored objects no manifest refers to, and leftover temp files, older than the grace period."""
+    referenced = set()
+    for path in Path("outputs").glob("*/runs/*.json"):
+        try:
+            steps = json.loads(path.read_text())["steps"].values()
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            console.print(f"[yellow]Skipping unreadable manifest {path}: {e}[/yellow]")
+            continue
+        for entry in steps:
+            referenced.update(entry[key] for key in ARTIFACT_KEYS if key in entry)
+
+    cutoff = time.time() - grace_seconds
+    removed, freed = 0, 0
+    candidates = list((STORE_DIR / "objects").glob("*/*")) + list(Path("outputs").glob("*/runs/*.tmp"))
+    for path in candidates:
+        if path.suffix == ".gz" and path.parent.name + path.stem in referenced:
+            continue
+        try:
+            stat = path.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        freed += stat.st_size
+        removed += 1
+    return removed, freed
+
+
 def extract_code_block(text: str) -> str:
     """Extract clean Python code from a response."""
     code_block = re.search(r"```(?:python)?\n(.*?)```", text, re.DOTALL)
@@ -69,7 +182,7 @@ def format_python_file(file_path: Path):
         console.print("[yellow]black or flake8 not found. Skipping formatting.[/yellow]")
 
 
-def call_openai(prompt: str, log_path: Path, model: str) -> str:
+def call_openai(prompt: str, model: str) -> tuple[str, str]:
     try:
         response = client.chat.completions.create(
             model=model,
@@ -81,12 +194,7 @@ def call_openai(prompt: str, log_path: Path, model: str) -> str:
             max_tokens=800
         )
         raw_output = response.choices[0].message.content.strip()
-        code_output = extract_code_block(raw_output)
-
-        save_text_file(log_path, f"[{timestamp()}] === PROMPT ===\n{prompt}\n\n"
-                                 f"[{timestamp()}] === RAW RESPONSE ===\n{raw_output}\n\n"
-                                 f"[{timestamp()}] === EXTRACTED CODE ===\n{code_output}")
-        return code_output
+        return raw_output, extract_code_block(raw_output)
     except Exception as e:
         console.print(f"[red]OpenAI API error:[/red] {e}")
         raise typer.Exit(1)
@@ -114,21 +222,7 @@ def get_dependencies(flow: list[dict], step_id: str) -> list[str]:
     return []
 
 
-@app.command()
-def eval(spec: str = typer.Argument(..., help="Path to the YAML spec")):
-    """Evaluate generated outputs using optional test scripts."""
-    spec_path = Path(spec)
-    if not spec_path.exists():
-        console.print(f"[red]Spec file not found:[/red] {spec}")
-        raise typer.Exit(1)
-
-    with spec_path.open('r') as f:
-        data = yaml.safe_load(f)
-
-    prompts = data.get('prompts', {})
-    spec_name = data.get('name', 'generative_spec')
-    output_dir = Path("outputs") / spec_name
-
+def run_eval_scripts(spec_name: str, prompts: dict):
     console.print(f"[bold cyan]Evaluating outputs for: {spec_name}[/bold cyan]")
     for step_id, step in prompts.items():
         eval_info = step.get("eval")
@@ -154,8 +248,59 @@ def eval(spec: str = typer.Argument(..., help="Path to the YAML spec")):
             except Exception as e:
                 console.print(f"[red]Error running test for {step_id}:[/red] {e}")
 
+
+@app.command()
+def eval(
+    spec: str = typer.Argument(..., help="Path to the YAML spec"),
+    run: Optional[str] = typer.Option(None, help="Run ID (or 'latest') whose modules to evaluate")
+):
+    """Evaluate generated outputs using optional test scripts."""
+    spec_path = Path(spec)
+    if not spec_path.exists():
+        console.print(f"[red]Spec file not found:[/red] {spec}")
+        raise typer.Exit(1)
+
+    with spec_path.open('r') as f:
+        data = yaml.safe_load(f)
+
+    prompts = data.get('prompts', {})
+    spec_name = data.get('name', 'generative_spec')
+    output_dir = Path("outputs") / spec_name
+
+    # Live modules replaced by a past run's, put back once the tests finish.
+    live_modules = {}
+    if run:
+        manifest = load_manifest(output_dir, run)
+        if not any("module" in entry for entry in manifest["steps"].values()):
+            console.print(f"[red]Run {manifest['run_id']} recorded no modules to evaluate.[/red]")
+            raise typer.Exit(1)
+        missing = [step_id for step_id in prompts if "module" not in manifest["steps"].get(step_id, {})]
+        if missing:
+            console.print(f"[yellow]Run {manifest['run_id']} has no module for: {', '.join(missing)}; "
+                          f"using live files for those steps.[/yellow]")
+        for step_id, entry in manifest["steps"].items():
+            if "module" in entry:
+                py_file = output_dir / f"{step_id}.py"
+                live_modules[py_file] = py_file.read_text() if py_file.exists() else None
+                save_text_file(py_file, load_object(entry["module"]))
+        console.print(f"[cyan]Evaluating modules from run {manifest['run_id']}[/cyan]")
+
+    try:
+        run_eval_scripts(spec_name, prompts)
+    finally:
+        for py_file, content in live_modules.items():
+            if content is None:
+                py_file.unlink(missing_ok=True)
+            else:
+                save_text_file(py_file, content)
+        if live_modules:
+            console.print("[cyan]Restored live modules.[/cyan]")
+
 @app.command()
-def trace(spec: str = typer.Argument(..., help="Path to the YAML spec")):
+def trace(
+    spec: str = typer.Argument(..., help="Path to the YAML spec"),
+    run: Optional[str] = typer.Option(None, help="Run ID (or 'latest') to trace from the artifact store")
+):
     """Display logs of prompt execution for review."""
     spec_path = Path(spec)
     if not spec_path.exists():
@@ -166,7 +311,15 @@ def trace(spec: str = typer.Argument(..., help="Path to the YAML spec")):
         data = yaml.safe_load(f)
 
     spec_name = data.get('name', 'generative_spec')
-    logs_dir = Path("outputs") / spec_name / "logs"
+    output_dir = Path("outputs") / spec_name
+    logs_dir = output_dir / "logs"
+
+    if run:
+        manifest = load_manifest(output_dir, run)
+        for step_id, entry in manifest["steps"].items():
+            console.rule(f"[bold green]Trace: {step_id} ({manifest['run_id']})[/bold green]")
+            console.print(Markdown(f"```log\n{render_log(entry)}\n```"))
+        return
 
     if not logs_dir.is_dir():
         console.print(f"[red]No logs found at {logs_dir}[/red]")
@@ -223,6 +376,15 @@ def run(
     output_dir.mkdir(parents=True, exist_ok=True)
     logs_dir.mkdir(parents=True, exist_ok=True)
 
+    manifest = {
+        "run_id": datetime.now().strftime("%Y%m%d-%H%M%S-%f"),
+        "spec": spec_name,
+        "started": timestamp(),
+        "integration": integration_mode,
+        "model": model,
+        "steps": {},
+    }
+
     for step_id in order:
         step = prompts[step_id]
         console.rule(f"[bold blue]Step: {step_id} — {step.get('title', '')}[/bold blue]")
@@ -251,15 +413,21 @@ def run(
             raise typer.Exit(1)
 
         console.print(f"[italic white]Prompt:[/italic white]\n{full_prompt}")
-        log_path = logs_dir / f"{step_id}.log"
+        entry = {"timestamp": timestamp(), "prompt": store_object(full_prompt)}
+        manifest["steps"][step_id] = entry
+        save_manifest(output_dir, manifest)
 
         if auto:
-            response = call_openai(full_prompt, log_path, model)
+            raw_output, response = call_openai(full_prompt, model)
+            entry["raw"] = store_object(raw_output)
         elif manual:
             console.print("[cyan]Please enter the model response below:[/cyan]")
             response = input("\n>> ")
-            save_text_file(log_path, f"[{timestamp()}] === MANUAL INPUT ===\n{response}")
 
+        entry["response"] = store_object(response)
+        save_manifest(output_dir, manifest)
+
+        save_text_file(logs_dir / f"{step_id}.log", render_log(entry))
         save_text_file(output_dir / f"{step_id}_response.md", response)
         console.print(f"[green]Saved response to {step_id}_response.md[/green]")
 
@@ -267,8 +435,65 @@ def run(
             py_file = output_dir / f"{step_id}.py"
             save_text_file(py_file, response)
             format_python_file(py_file)
+            entry["module"] = store_object(py_file.read_text())
+            save_manifest(output_dir, manifest)
             console.print(f"[green]Saved and formatted module to {step_id}.py[/green]")
 
+    console.print(f"[green]Recorded run {manifest['run_id']}[/green]")
+
+
+@app.command()
+def runs(spec: str = typer.Argument(..., help="Path to the YAML spec")):
+    """List recorded runs of a spec."""
+    spec_path = Path(spec)
+    if not spec_path.exists():
+        console.print(f"[red]Spec file not found:[/red] {spec}")
+        raise typer.Exit(1)
+
+    with spec_path.open('r') as f:
+        data = yaml.safe_load(f)
+
+    spec_name = data.get('name', 'generative_spec')
+    manifests = list_manifests(Path("outputs") / spec_name)
+    if not manifests:
+        console.print(f"[yellow]No recorded runs for {spec_name}.[/yellow]")
+        raise typer.Exit()
+
+    table = Table(title=f"Runs: {spec_name}")
+    for column in ("Run", "Started", "Steps", "Model", "Integration"):
+        table.add_column(column)
+    for path in manifests:
+        manifest = json.loads(path.read_text())
+        table.add_row(manifest["run_id"], manifest["started"], str(len(manifest["steps"])),
+                      manifest["model"], manifest["integration"])
+    console.print(table)
+
+
+@app.command()
+def gc(
+    spec: Optional[str] = typer.Argument(None, help="Path to the YAML spec whose old runs to prune"),
+    keep: int = typer.Option(10, min=0, help="Number of most recent runs to keep for the spec"),
+    grace: int = typer.Option(3600, min=0, help="Keep unreferenced artifacts newer than this many seconds")
+):
+    """Prune old runs and remove stored artifacts no run refers to."""
+    if spec:
+        spec_path = Path(spec)
+        if not spec_path.exists():
+            console.print(f"[red]Spec file not found:[/red] {spec}")
+            raise typer.Exit(1)
+
+        with spec_path.open('r') as f:
+            data = yaml.safe_load(f)
+
+        manifests = list_manifests(Path("outputs") / data.get('name', 'generative_spec'))
+        expired = manifests[:-keep] if keep > 0 else manifests
+        for path in expired:
+            path.unlink()
+        console.print(f"[green]Pruned {len(expired)} run(s), kept {len(manifests) - len(expired)}.[/green]")
+
+    removed, freed = sweep_store(grace)
+    console.print(f"[green]Removed {removed} unreferenced artifact(s), freed {freed} bytes.[/green]")
+
 
 if __name__ == "__main__":
     app()
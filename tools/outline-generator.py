@@ -1,4 +1,7 @@
 from typing import Optional
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import typer
 from rich import print
 from rich.console import Console
@@ -36,7 +39,7 @@ def parse_prompt_file(prompt_path: Path) -> tuple[str, str]:
     return system_prompt, user_prompt
 
 
-def call_llm(system_prompt: str, user_prompt: str) -> str:
+def call_llm(system_prompt: str, user_prompt: str, max_tokens: int = 1500) -> str:
     try:
         response = client.chat.completions.create(
             model="gpt-4",
@@ -45,7 +48,7 @@ def call_llm(system_prompt: str, user_prompt: str) -> str:
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.3,
-            max_tokens=1500
+            max_tokens=max_tokens
         )
         return response.choices[0].message.content.strip()
     except Exception as e:
@@ -53,10 +56,76 @@ def call_llm(system_prompt: str, user_prompt: str) -> str:
         raise typer.Exit(1)
 
 
+def extract_yaml_block(text: str) -> str:
+    """Extract the YAML body from a response that may be wrapped in a code fence."""
+    yaml_block = re.search(r"```(?:ya?ml)?\n(.*?)```", text, re.DOTALL)
+    return yaml_block.group(1).strip() if yaml_block else text.strip()
+
+
+def run_parallel(fn, items: list, jobs: int) -> list:
+    """Apply fn to each item with at most `jobs` concurrent LLM calls, preserving order."""
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(fn, items))
+
+
+def chunk_text(text: str, chunk_chars: int) -> list[str]:
+    """Split text on paragraph boundaries into chunks of at most chunk_chars characters."""
+    if chunk_chars < 1:
+        raise ValueError("chunk_chars must be at least 1")
+    chunks = []
+    current = ""
+    for paragraph in text.split("\n\n"):
+        while len(paragraph) > chunk_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:chunk_chars])
+            paragraph = paragraph[chunk_chars:]
+        if current and len(current) + len(paragraph) + 2 > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def condense_spec(product_spec: str, chunk_chars: int, jobs: int) -> str:
+    """Map-reduce a long product spec until it fits in chunk_chars characters for one outline request."""
+    text = product_spec
+    chunks = chunk_text(text, chunk_chars)
+    if len(chunks) <= 1:
+        return text
+
+    system_prompt, user_instruction = parse_prompt_file(Path("prompts/spec-chunk.prompt"))
+
+    while len(chunks) > 1:
+        console.print(f"[cyan]Product spec is {len(text)} chars; condensing {len(chunks)} chunks "
+                      f"with {jobs} parallel calls.[/cyan]")
+        # Budget each summary so the joined result fits in one chunk (~4 characters per token).
+        max_tokens = min(1500, max(64, chunk_chars // (4 * len(chunks))))
+
+        def summarize(indexed_chunk: tuple[int, str]) -> str:
+            index, chunk = indexed_chunk
+            return call_llm(system_prompt, f"{user_instruction}\n\nPart {index + 1} of {len(chunks)}:\n\n{chunk}",
+                            max_tokens=max_tokens)
+
+        condensed = "\n\n".join(run_parallel(summarize, list(enumerate(chunks)), jobs))
+        if len(condensed) >= len(text):
+            console.print(f"[red]Could not condense product spec below {chunk_chars} chars.[/red]")
+            raise typer.Exit(1)
+        text = condensed
+        chunks = chunk_text(text, chunk_chars)
+
+    return text
+
+
 @app.command()
 def from_prompt(
     prompt_file: str = typer.Option("prompts/from_prompt_instruction.txt", help="Path to prompt instruction file"),
-    spec_file: Optional[str] = typer.Option(None, help="Optional path to file containing the product spec")
+    spec_file: Optional[str] = typer.Option(None, help="Optional path to file containing the product spec"),
+    chunk_chars: int = typer.Option(12000, min=1, help="Condense product specs longer than this many characters"),
+    jobs: int = typer.Option(4, min=1, help="Maximum number of concurrent LLM calls when condensing")
 ):
     console.print("[bold green]LLM-assisted Generative Outline Generator[/bold green]")
 
@@ -70,16 +139,177 @@ def from_prompt(
         product_spec = Prompt.ask("Describe your product idea (freeform)")
 
     system_prompt, user_instruction = parse_prompt_file(Path(prompt_file))
+    product_spec = condense_spec(product_spec, chunk_chars, jobs)
     full_prompt = user_instruction + "\n\n" + product_spec
     response = call_llm(system_prompt, full_prompt)
     console.rule("[bold yellow]Generated Outline[/bold yellow]")
     console.print(response)
     path = Prompt.ask("Save YAML to file", default="generative_outline.yaml")
     with open(path, "w") as f:
-        f.write(response)
+        f.write(extract_yaml_block(response) + "\n")
     console.print(f"[green]Saved to {path}[/green]")
 
 
+def compile_flow(components: list[dict], interfaces: list[dict]) -> list[dict]:
+    """Map component `after:` lists and interface `connects` pairs onto an acyclic jits flow."""
+    ids = []
+    for comp in components:
+        if not isinstance(comp, dict) or "id" not in comp:
+            console.print(f"[red]Component must be a mapping with an id:[/red] {comp}")
+            raise typer.Exit(1)
+        if comp["id"] in ids:
+            console.print(f"[red]Duplicate component ID:[/red] {comp['id']}")
+            raise typer.Exit(1)
+        ids.append(comp["id"])
+    deps = {cid: [] for cid in ids}
+
+    def add_dep(target: str, source: str, origin: str):
+        if source not in deps or target not in deps:
+            console.print(f"[red]Unknown component in {origin}:[/red] {source} -> {target}")
+            raise typer.Exit(1)
+        if source != target and source not in deps[target]:
+            deps[target].append(source)
+
+    for comp in components:
+        after = comp.get("after") or []
+        if not isinstance(after, list):
+            console.print(f"[red]Component {comp['id']} after must be a list of IDs:[/red] {after}")
+            raise typer.Exit(1)
+        for dep in after:
+            add_dep(comp["id"], dep, f"after of {comp['id']}")
+    for iface in interfaces:
+        if not isinstance(iface, dict) or "id" not in iface:
+            console.print(f"[red]Interface must be a mapping with an id:[/red] {iface}")
+            raise typer.Exit(1)
+        connects = iface.get("connects") or []
+        if not isinstance(connects, list):
+            console.print(f"[red]Interface {iface['id']} connects must be a list of pairs:[/red] {connects}")
+            raise typer.Exit(1)
+        for pair in connects:
+            if not isinstance(pair, list) or len(pair) != 2:
+                console.print(f"[red]Interface {iface['id']} connects entries must be [source, target] pairs:[/red] {pair}")
+                raise typer.Exit(1)
+            src, tgt = pair
+            add_dep(tgt, src, f"interface {iface['id']}")
+
+    in_degree = {cid: len(deps[cid]) for cid in ids}
+    queue = deque(cid for cid in ids if in_degree[cid] == 0)
+    resolved = 0
+    while queue:
+        current = queue.popleft()
+        resolved += 1
+        for cid in ids:
+            if current in deps[cid]:
+                in_degree[cid] -= 1
+                if in_degree[cid] == 0:
+                    queue.append(cid)
+    if resolved != len(ids):
+        cyclic = [cid for cid in ids if in_degree[cid] > 0]
+        console.print(f"[red]Cycle detected in outline dependencies:[/red] {', '.join(cyclic)}")
+        raise typer.Exit(1)
+
+    flow = []
+    for cid in ids:
+        node = {"id": cid}
+        if deps[cid]:
+            node["after"] = deps[cid]
+        flow.append(node)
+    return flow
+
+
+def describe_component(comp: dict, components: dict, interfaces: dict, after: list[str]) -> str:
+    """Render one component and its surrounding contracts as context for its step prompt."""
+    lines = [yaml.safe_dump(comp, sort_keys=False).strip()]
+    iface = interfaces.get(comp.get("interface"))
+    if iface:
+        lines.append(f"Interface {iface['id']}: {iface.get('description', '')}")
+    for dep in after:
+        upstream = components[dep]
+        lines.append(f"Depends on {dep}: {upstream.get('role', '')} "
+                     f"(outputs: {', '.join(map(str, upstream.get('outputs') or []))})")
+    return "\n".join(lines)
+
+
+@app.command()
+def compile(
+    outline_file: str = typer.Argument("generative_outline.yaml", help="Path to the generative outline"),
+    output: Optional[str] = typer.Option(None, help="Path for the generated jits spec (default: <name>.yaml)"),
+    name: str = typer.Option("generative_spec", help="Name of the generated spec"),
+    integration: str = typer.Option("module", help="Integration mode for the generated spec (inline or module)"),
+    model: str = typer.Option("gpt-4", help="Model recorded in the generated spec settings"),
+    prompt_file: str = typer.Option("prompts/compile-step.prompt", help="Path to step prompt instruction file"),
+    jobs: int = typer.Option(4, min=1, help="Maximum number of concurrent LLM calls"),
+    force: bool = typer.Option(False, help="Overwrite the output file if it already exists")
+):
+    """Compile a generative outline into a runnable jits YAML spec."""
+    outline_path = Path(outline_file)
+    if not outline_path.exists():
+        console.print(f"[red]Outline file not found:[/red] {outline_path}")
+        raise typer.Exit(1)
+
+    if integration not in ("inline", "module"):
+        console.print(f"[red]Unknown integration mode: {integration}[/red]")
+        raise typer.Exit(1)
+
+    path = output or f"{name}.yaml"
+    if Path(path).exists() and not force:
+        console.print(f"[red]Output file already exists:[/red] {path} (use --force to overwrite)")
+        raise typer.Exit(1)
+
+    try:
+        data = yaml.safe_load(extract_yaml_block(outline_path.read_text(encoding="utf-8"))) or {}
+    except yaml.YAMLError as e:
+        console.print(f"[red]Invalid YAML in outline:[/red] {e}")
+        raise typer.Exit(1)
+
+    if not isinstance(data, dict):
+        console.print("[red]Outline must be a YAML mapping with components and interfaces.[/red]")
+        raise typer.Exit(1)
+
+    components = data.get("components") or []
+    interfaces = data.get("interfaces") or []
+    if not isinstance(components, list) or not isinstance(interfaces, list):
+        console.print("[red]Outline components and interfaces must be lists.[/red]")
+        raise typer.Exit(1)
+    if not components:
+        console.print("[red]Outline defines no components.[/red]")
+        raise typer.Exit(1)
+
+    flow = compile_flow(components, interfaces)
+    if integration == "module":
+        invalid = [node["id"] for node in flow if not str(node["id"]).isidentifier()]
+        if invalid:
+            console.print(f"[red]Component IDs must be valid Python identifiers in module mode:[/red] "
+                          f"{', '.join(map(str, invalid))}")
+            raise typer.Exit(1)
+    by_id = {c["id"]: c for c in components}
+    ifaces_by_id = {i["id"]: i for i in interfaces}
+    system_prompt, user_instruction = parse_prompt_file(Path(prompt_file))
+
+    def generate_step(node: dict) -> str:
+        context = describe_component(by_id[node["id"]], by_id, ifaces_by_id, node.get("after", []))
+        step_prompt = call_llm(system_prompt, f"{user_instruction}\n\n{context}", max_tokens=600)
+        console.print(f"[green]Generated prompt for {node['id']}[/green]")
+        return step_prompt
+
+    console.print(f"[bold green]Compiling {len(components)} components with {jobs} parallel calls[/bold green]")
+    step_prompts = run_parallel(generate_step, flow, jobs)
+
+    spec = {
+        "name": name,
+        "settings": {"integration": integration, "model": model},
+        "prompts": {
+            node["id"]: {"title": by_id[node["id"]].get("role", node["id"]), "prompt": text}
+            for node, text in zip(flow, step_prompts)
+        },
+        "flow": flow,
+    }
+
+    with open(path, "w") as f:
+        yaml.safe_dump(spec, f, sort_keys=False)
+    console.print(f"[green]Saved spec to {path}[/green]")
+
+
 @app.command()
 def interactive():
     console.print("[bold blue]Generative Outline Builder[/bold blue]")
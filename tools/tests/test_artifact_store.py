@@ -0,0 +1,130 @@
+import gzip
+import importlib.util
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+_spec = importlib.util.spec_from_file_location("jits", TOOLS_DIR / "jits.py")
+jits = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(jits)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def write_manifest(spec_name: str, run_id: str, steps: dict):
+    jits.save_manifest(Path("outputs") / spec_name, {
+        "run_id": run_id, "spec": spec_name, "started": "now",
+        "integration": "module", "model": "gpt-4", "steps": steps,
+    })
+
+
+def age(path: Path, seconds: int):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_store_object_deduplicates_and_compresses(workdir):
+    first = jits.store_object("print('hello')\n" * 100)
+    second = jits.store_object("print('hello')\n" * 100)
+    assert first == second
+    objects = list((jits.STORE_DIR / "objects").glob("*/*"))
+    assert len(objects) == 1
+    assert objects[0].stat().st_size < len("print('hello')\n" * 100)
+    assert gzip.decompress(objects[0].read_bytes()).decode() == jits.load_object(first)
+
+
+def test_store_object_rewrites_object_removed_by_gc(workdir):
+    digest = jits.store_object("prompt")
+    jits.object_path(digest).unlink()
+    assert jits.store_object("prompt") == digest
+    assert jits.load_object(digest) == "prompt"
+
+
+def test_store_object_concurrent_writers(workdir):
+    content = "x = 1\n" * 10000
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        digests = set(pool.map(lambda _: jits.store_object(content), range(32)))
+    assert len(digests) == 1
+    assert jits.load_object(digests.pop()) == content
+    assert not list((jits.STORE_DIR / "objects").glob("*/*.tmp"))
+
+
+def test_sweep_store_skips_unreadable_manifest(workdir):
+    kept = jits.store_object("kept")
+    write_manifest("app", "run-1", {"step": {"timestamp": "t", "prompt": kept}})
+    (Path("outputs") / "other" / "runs").mkdir(parents=True)
+    (Path("outputs") / "other" / "runs" / "run-2.json").write_text('{"steps": {')
+    age(jits.object_path(kept), 7200)
+
+    jits.sweep_store(3600)
+    assert jits.object_path(kept).exists()
+
+
+def test_sweep_store_keeps_referenced_and_recent_objects(workdir):
+    kept = jits.store_object("kept")
+    stale = jits.store_object("stale")
+    recent = jits.store_object("recent")
+    write_manifest("app", "run-1", {"step": {"timestamp": "t", "prompt": kept}})
+    age(jits.object_path(kept), 7200)
+    age(jits.object_path(stale), 7200)
+    leftover = jits.object_path(stale).with_name("partial.tmp")
+    leftover.write_bytes(b"")
+    age(leftover, 7200)
+
+    removed, _ = jits.sweep_store(3600)
+
+    assert removed == 2
+    assert jits.object_path(kept).exists()
+    assert jits.object_path(recent).exists()
+    assert not jits.object_path(stale).exists()
+    assert not leftover.exists()
+
+
+def test_render_log_handles_pending_step(workdir):
+    prompt = jits.store_object("write code")
+    assert "NO RESPONSE RECORDED" in jits.render_log({"timestamp": "t", "prompt": prompt})
+
+
+def test_eval_run_restores_live_modules(workdir, monkeypatch):
+    spec = workdir / "app.yaml"
+    spec.write_text("name: app\nprompts:\n  step: {prompt: x}\nflow:\n  - id: step\n")
+    live = workdir / "outputs" / "app" / "step.py"
+    live.parent.mkdir(parents=True)
+    live.write_text("LIVE = True\n")
+    write_manifest("app", "run-1", {"step": {
+        "timestamp": "t", "prompt": jits.store_object("x"),
+        "response": jits.store_object("OLD = True"), "module": jits.store_object("OLD = True\n"),
+    }})
+
+    seen = []
+    monkeypatch.setattr(jits, "run_eval_scripts", lambda spec_name, prompts: seen.append(live.read_text()))
+
+    result = CliRunner().invoke(jits.app, ["eval", str(spec), "--run", "run-1"])
+    assert result.exit_code == 0
+    assert seen == ["OLD = True\n"]
+    assert live.read_text() == "LIVE = True\n"
+    assert json.loads((workdir / "outputs" / "app" / "runs" / "run-1.json").read_text())["run_id"] == "run-1"
+
+
+def test_eval_run_without_modules_fails(workdir, monkeypatch):
+    spec = workdir / "app.yaml"
+    spec.write_text("name: app\nprompts:\n  step: {prompt: x}\nflow:\n  - id: step\n")
+    write_manifest("app", "run-1", {"step": {
+        "timestamp": "t", "prompt": jits.store_object("x"), "response": jits.store_object("y"),
+    }})
+    monkeypatch.setattr(jits, "run_eval_scripts", lambda spec_name, prompts: pytest.fail("should not run"))
+
+    result = CliRunner().invoke(jits.app, ["eval", str(spec), "--run", "run-1"])
+    assert result.exit_code == 1
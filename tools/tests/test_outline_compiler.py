@@ -0,0 +1,125 @@
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+_spec = importlib.util.spec_from_file_location("outline_generator", TOOLS_DIR / "outline-generator.py")
+outline_generator = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(outline_generator)
+
+
+def test_chunk_text_respects_limit():
+    text = "a" * 5 + "\n\n" + "b" * 25 + "\n\n" + "c" * 3
+    chunks = outline_generator.chunk_text(text, 10)
+    assert all(len(chunk) <= 10 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+
+
+def test_chunk_text_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        outline_generator.chunk_text("abc", 0)
+
+
+def test_condense_spec_reduces_until_it_fits(monkeypatch):
+    monkeypatch.chdir(TOOLS_DIR)
+    monkeypatch.setattr(outline_generator, "call_llm",
+                        lambda system, user, max_tokens=1500: user[-max_tokens * 4:][:600])
+    spec = "\n\n".join("x" * 900 for _ in range(200))
+    condensed = outline_generator.condense_spec(spec, 1000, 4)
+    assert len(condensed) <= 1000
+
+
+def test_compile_flow_treats_null_lists_as_empty():
+    components = [{"id": "a", "after": None}, {"id": "b", "after": ["a"]}]
+    interfaces = [{"id": "i", "connects": None}]
+    assert outline_generator.compile_flow(components, interfaces) == [{"id": "a"}, {"id": "b", "after": ["a"]}]
+
+
+def test_extract_yaml_block():
+    assert outline_generator.extract_yaml_block("```yaml\ncomponents: []\n```") == "components: []"
+    assert outline_generator.extract_yaml_block("components: []\n") == "components: []"
+
+
+def test_compile_flow_merges_after_and_connects():
+    components = [{"id": "file_reader"}, {"id": "count_logic"}, {"id": "cli_wrapper", "after": ["file_reader"]}]
+    interfaces = [{"id": "pipeline", "connects": [["file_reader", "count_logic"], ["count_logic", "cli_wrapper"]]}]
+    assert outline_generator.compile_flow(components, interfaces) == [
+        {"id": "file_reader"},
+        {"id": "count_logic", "after": ["file_reader"]},
+        {"id": "cli_wrapper", "after": ["file_reader", "count_logic"]},
+    ]
+
+
+@pytest.mark.parametrize("components, interfaces", [
+    ([{"id": "a", "after": ["b"]}, {"id": "b", "after": ["a"]}], []),
+    ([{"id": "a", "after": ["b"]}, {"id": "b"}], [{"id": "i", "connects": [["a", "b"]]}]),
+    ([{"id": "a"}, {"id": "a"}], []),
+    ([{"id": "a"}, {"id": "b"}], [{"id": "i", "connects": [["a"]]}]),
+    ([{"id": "a", "after": ["missing"]}], []),
+    ([{"id": "a"}, {"id": "b", "after": "a"}], []),
+    ([{"id": "a"}, {"id": "b"}], [{"id": "i", "connects": "a,b"}]),
+])
+def test_compile_flow_rejects_invalid_outlines(components, interfaces):
+    with pytest.raises(typer.Exit):
+        outline_generator.compile_flow(components, interfaces)
+
+
+def test_compile_refuses_to_overwrite_without_force(tmp_path, monkeypatch):
+    monkeypatch.chdir(TOOLS_DIR)
+    calls = []
+    monkeypatch.setattr(outline_generator, "call_llm", lambda *args, **kwargs: calls.append(args) or "prompt")
+    outline = tmp_path / "outline.yaml"
+    outline.write_text("components:\n  - id: a\n")
+    existing = tmp_path / "spec.yaml"
+    existing.write_text("keep me")
+
+    result = CliRunner().invoke(outline_generator.app, ["compile", str(outline), "--output", str(existing)])
+    assert result.exit_code == 1
+    assert existing.read_text() == "keep me"
+    assert not calls
+
+    result = CliRunner().invoke(outline_generator.app, ["compile", str(outline), "--output", str(existing), "--force"])
+    assert result.exit_code == 0
+    assert "prompt" in existing.read_text()
+
+
+def test_compile_accepts_fenced_outline(tmp_path, monkeypatch):
+    monkeypatch.chdir(TOOLS_DIR)
+    monkeypatch.setattr(outline_generator, "call_llm", lambda *args, **kwargs: "prompt")
+    outline = tmp_path / "outline.yaml"
+    outline.write_text("```yaml\n# Type: Program\ncomponents:\n  - id: a\n    after:\n```\n")
+    output = tmp_path / "o.yaml"
+    result = CliRunner().invoke(outline_generator.app, ["compile", str(outline), "--output", str(output)])
+    assert result.exit_code == 0
+    assert "prompt" in output.read_text()
+
+
+def test_compile_rejects_non_mapping_outline(tmp_path, monkeypatch):
+    monkeypatch.chdir(TOOLS_DIR)
+    outline = tmp_path / "outline.yaml"
+    outline.write_text("- id: a\n")
+    result = CliRunner().invoke(outline_generator.app, ["compile", str(outline), "--output", str(tmp_path / "o.yaml")])
+    assert result.exit_code == 1
+
+
+def test_compile_rejects_non_identifier_ids_in_module_mode(tmp_path, monkeypatch):
+    monkeypatch.chdir(TOOLS_DIR)
+    calls = []
+    monkeypatch.setattr(outline_generator, "call_llm", lambda *args, **kwargs: calls.append(args) or "prompt")
+    outline = tmp_path / "outline.yaml"
+    outline.write_text("components:\n  - id: file-reader\n")
+    output = tmp_path / "o.yaml"
+
+    result = CliRunner().invoke(outline_generator.app, ["compile", str(outline), "--output", str(output)])
+    assert result.exit_code == 1
+    assert not calls
+
+    result = CliRunner().invoke(outline_generator.app,
+                                ["compile", str(outline), "--output", str(output), "--integration", "inline"])
+    assert result.exit_code == 0